@@ -1,5 +1,6 @@
 import json
 from collections import defaultdict
+from typing import FrozenSet, NamedTuple, Set, Tuple, Union
 
 import boto3
 import parliament
@@ -14,6 +15,27 @@ REQUIRED_PERMISSIONS = [
     "ssmmessages:OpenDataChannel",
 ]
 
+# Managed policies are keyed by ARN, inline policies by (role name, policy name) since
+# inline policy names are only unique within their role.
+PolicyKey = Union[str, Tuple[str, str]]
+
+
+class InstanceStatus(NamedTuple):
+    instance_id: str
+    profile: str
+    roles: FrozenSet[str]
+    policies: FrozenSet[PolicyKey]
+    ssm_policies: FrozenSet[PolicyKey]
+    registered: bool
+
+    @property
+    def has_ssm_policy(self) -> bool:
+        return bool(self.ssm_policies)
+
+    @property
+    def healthy(self) -> bool:
+        return self.has_ssm_policy and self.registered
+
 
 class InstancesWithoutSSM(Script):
     # Setup
@@ -34,9 +56,26 @@ class InstancesWithoutSSM(Script):
         self.roles = defaultdict(set)
         self.policies = {}
         self.ssm_policies = set()
+        self.ssm_instance_ids = set()
+        self.instance_matrix = {}
+        self.policy_instances = defaultdict(set)
 
     # Helpers
 
+    def _profile_name(self, instance) -> str:
+        return instance.iam_instance_profile["Arn"].split("/")[-1]
+
+    def _policy_label(self, key: PolicyKey) -> str:
+        if isinstance(key, tuple):
+            role, name = key
+            return f"{name} (inline in {role})"
+        return key
+
+    def _report_instance(self, instance_id):
+        instance = self.instances[instance_id]
+        self._failure(f"Instance {instance.id} has the following tags:")
+        self._failure(f"{json.dumps(instance.tags, indent=2)}")
+
     def populate_instance(self):
         self._section_start("Finding Instances")
 
@@ -44,7 +83,7 @@ class InstancesWithoutSSM(Script):
             Filters=[{"Name": "instance-state-name", "Values": ["running"]}]
         )
         for instance in instances:
-            profile_name = instance.iam_instance_profile["Arn"].split("/")[-1]
+            profile_name = self._profile_name(instance)
 
             self.instances[instance.id] = instance
             self.instance_profiles[profile_name].add(instance.id)
@@ -69,25 +108,28 @@ class InstancesWithoutSSM(Script):
             for policy in self.iam.list_role_policies(RoleName=role)["PolicyNames"]:
                 document = self.iam.get_role_policy(RoleName=role, PolicyName=policy)
 
-                self.roles[role].add(policy)
-                self.policies[policy] = document["PolicyDocument"]
+                self.roles[role].add((role, policy))
+                self.policies[(role, policy)] = document["PolicyDocument"]
             for policy in self.iam.list_attached_role_policies(RoleName=role)["AttachedPolicies"]:
-                version = self.iam.get_policy(PolicyArn=policy["PolicyArn"])["Policy"]
+                arn = policy["PolicyArn"]
+                self.roles[role].add(arn)
+                if arn in self.policies:
+                    continue
+
+                version = self.iam.get_policy(PolicyArn=arn)["Policy"]
                 document = self.iam.get_policy_version(
-                    PolicyArn=policy["PolicyArn"], VersionId=version["DefaultVersionId"]
+                    PolicyArn=arn, VersionId=version["DefaultVersionId"]
                 )
-
-                self.roles[role].add(policy["PolicyName"])
-                self.policies[policy["PolicyName"]] = document["PolicyVersion"]["Document"]
+                self.policies[arn] = document["PolicyVersion"]["Document"]
 
         self._section_end(f"Found {len(self.policies)} Policies")
 
     def check_policies(self):
         self._section_start("Checking Policies")
 
-        for name, document in self.policies.items():
-            if self.check_policy(name, document):
-                self.ssm_policies.add(name)
+        for key, document in self.policies.items():
+            if self.check_policy(self._policy_label(key), document):
+                self.ssm_policies.add(key)
 
         self._section_end(f"Verified {len(self.ssm_policies)} SSM Policies")
 
@@ -103,59 +145,117 @@ class InstancesWithoutSSM(Script):
         self._success(f"Found Valid SSM Instance Policy {name}")
         return True
 
+    def populate_ssm_instances(self):
+        self._section_start("Fetching SSM Instances")
+
+        self.ssm_instance_ids = {
+            i["InstanceId"]
+            for page in self.ssm.get_paginator("describe_instance_information").paginate()
+            for i in page["InstanceInformationList"]
+        }
+
+        self._section_end(f"Found {len(self.ssm_instance_ids)} SSM Instances")
+
+    def build_matrix(self):
+        """Resolve profile -> role -> policy -> registration for every instance from the caches."""
+        self._section_start("Building Instance Matrix")
+
+        for profile, instance_ids in self.instance_profiles.items():
+            roles = frozenset(self.profile_roles[profile])
+            policies = frozenset(p for role in roles for p in self.roles[role])
+            ssm_policies = policies & self.ssm_policies
+
+            for instance_id in instance_ids:
+                self.instance_matrix[instance_id] = InstanceStatus(
+                    instance_id=instance_id,
+                    profile=profile,
+                    roles=roles,
+                    policies=policies,
+                    ssm_policies=ssm_policies,
+                    registered=instance_id in self.ssm_instance_ids,
+                )
+                for policy in policies:
+                    self.policy_instances[policy].add(instance_id)
+
+        healthy = sum(1 for status in self.instance_matrix.values() if status.healthy)
+        self._section_end(f"{healthy} of {len(self.instance_matrix)} Instances are SSM Ready")
+
+    def instances_affected_by(self, policy: PolicyKey) -> Set[str]:
+        """
+        Instances with ``policy`` attached via any of their roles. ``policy`` is a managed
+        policy ARN, or a (role name, policy name) pair for an inline policy.
+        """
+        return set(self.policy_instances.get(policy, set()))
+
+    def instances_relying_on(self, policy: PolicyKey) -> Set[str]:
+        """Instances that would lose SSM access if ``policy`` stopped granting it."""
+        return {
+            instance_id
+            for instance_id in self.instances_affected_by(policy)
+            if self.instance_matrix[instance_id].ssm_policies == {policy}
+        }
+
+    def check_policy_dependents(self):
+        self._section_start("Checking SSM Policy Dependents")
+
+        for policy in sorted(self.ssm_policies, key=self._policy_label):
+            affected = self.instances_affected_by(policy)
+            relying = self.instances_relying_on(policy)
+            label = self._policy_label(policy)
+            self._success(
+                f"SSM Policy {label} is attached to {len(affected)} instances, "
+                f"{len(relying)} of which have no other SSM policy"
+            )
+
+        self._section_end(f"Checked {len(self.ssm_policies)} SSM Policies")
+
     def check_instances(self):
         self._section_start("Checking Instance Profiles")
 
-        ssm_roles = {role for role, policies in self.roles.items() if policies & self.ssm_policies}
-        ssm_profiles = {
-            profile for profile, roles in self.profile_roles.items() if roles & ssm_roles
-        }
+        bad_profiles = defaultdict(list)
+        for status in self.instance_matrix.values():
+            if not status.has_ssm_policy:
+                bad_profiles[status.profile].append(status.instance_id)
 
-        if bad_profiles := self.instance_profiles.keys() - ssm_profiles:
+        if bad_profiles:
             self._error(f"Found {len(bad_profiles)} Bad Instance Profiles")
 
-            for profile in bad_profiles:
-                self._error(f"Instances with profile {profile} will not be able to connect to SSM")
-                instance = self.instances[next(iter(self.instance_profiles[profile]))]
-                self._failure(f"One such instance ({instance.id}) has the following tags:")
-                self._failure(f"{json.dumps(instance.tags, indent=2)}")
+            for profile, instance_ids in sorted(bad_profiles.items()):
+                self._error(
+                    f"{len(instance_ids)} instances with profile {profile} "
+                    "will not be able to connect to SSM"
+                )
+                for instance_id in sorted(instance_ids):
+                    self._report_instance(instance_id)
         else:
             self._section_end("No Bad Instance Profiles!")
 
     def check_ssm_instances(self):
         self._section_start("Checking SSM Instances")
 
-        instances = [
-            i
-            for page in self.ssm.get_paginator("describe_instance_information").paginate()
-            for i in page["InstanceInformationList"]
-        ]
-        instance_ids = {i["InstanceId"] for i in instances}
+        missing = defaultdict(list)
+        for status in self.instance_matrix.values():
+            if not status.registered:
+                missing[status.profile].append(status.instance_id)
 
-        if missing_ids := self.instances.keys() - instance_ids:
-            self.report_missing_ssm_instances(missing_ids)
+        if missing:
+            self.report_missing_ssm_instances(missing)
         else:
             self._section_end("No Instances Missing in SSM!")
 
-    def report_missing_ssm_instances(self, missing_ids):
-        self._error(f"Found {len(missing_ids)} Instances Missing in SSM")
+    def report_missing_ssm_instances(self, missing):
+        self._error(f"Found {sum(map(len, missing.values()))} Instances Missing in SSM")
 
-        reported_profiles = set()
-
-        for instance_id in missing_ids:
-            instance = self.instances[instance_id]
-            profile = instance.iam_instance_profile["Arn"].split("/")[-1]
-
-            if profile in reported_profiles:
+        for profile, instance_ids in sorted(missing.items()):
+            self._error(
+                f"{len(instance_ids)} instances with the {profile} profile are missing in SSM"
+            )
+            if not self.instance_matrix[instance_ids[0]].has_ssm_policy:
+                # Already reported with their tags under the bad instance profiles.
+                self._failure(f"Instances with the {profile} profile are listed above")
                 continue
-            else:
-                reported_profiles.add(profile)
-                if len(reported_profiles) > 3:
-                    return
-
-            self._error(f"At least one instance with the {profile} profile is missing in SSM")
-            self._failure(f"One such instance ({instance.id}) has the following tags:")
-            self._failure(f"{json.dumps(instance.tags, indent=2)}")
+            for instance_id in sorted(instance_ids):
+                self._report_instance(instance_id)
 
     # Run
 
@@ -164,6 +264,9 @@ class InstancesWithoutSSM(Script):
         self.populate_roles()
         self.populate_policies()
         self.check_policies()
+        self.populate_ssm_instances()
+        self.build_matrix()
+        self.check_policy_dependents()
         self.check_instances()
         self.check_ssm_instances()
 
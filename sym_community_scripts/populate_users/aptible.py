@@ -6,14 +6,24 @@ import requests
 from requests.exceptions import InvalidJSONError
 
 from .integration import Integration, IntegrationException
+from .rate_limit import Throttled, parse_retry_after
 
 
 class Aptible(Integration, slug="aptible"):
     def __init__(self) -> None:
         self.token = None
 
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        def send() -> requests.Response:
+            r = requests.request(method, f"https://auth.aptible.com/{path}", **kwargs)
+            if r.status_code == 429:
+                raise Throttled(parse_retry_after(r.headers.get("Retry-After")))
+            return r
+
+        return self._schedule(send)
+
     def _create_access_token(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
-        r = requests.post("https://auth.aptible.com/tokens", json=payload)
+        r = self._request("POST", "tokens", json=payload)
         try:
             return r.status_code, r.json()
         except InvalidJSONError as e:
@@ -54,8 +64,9 @@ class Aptible(Integration, slug="aptible"):
         return inquirer.prompt([question])["organization_id"]
 
     def _fetch_aptible_resource(self, path: str) -> Dict[str, Any]:
-        r = requests.get(
-            f"https://auth.aptible.com/{path}",
+        r = self._request(
+            "GET",
+            path,
             headers={
                 "Authorization": f"Bearer {self.token}",
             },
@@ -1,24 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
-from typing import Dict, Generator, Optional, Set
+from typing import Callable, Dict, Generator, Optional, Set
 
 import boto3
 import inquirer
-from botocore.exceptions import BotoCoreError, ClientError
+from botocore.config import Config
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+    ConnectionClosedError,
+    EndpointConnectionError,
+)
 
 from .integration import Integration, IntegrationException
+from .rate_limit import Throttled
+
+# The throttling error codes botocore's retry handler recognises.
+THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "ProvisionedThroughputExceededException",
+    "TransactionInProgressException",
+    "RequestLimitExceeded",
+    "BandwidthLimitExceeded",
+    "LimitExceededException",
+    "RequestThrottled",
+    "SlowDown",
+    "PriorRequestNotComplete",
+    "EC2ThrottledException",
+}
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+TRANSIENT_EXCEPTIONS = (EndpointConnectionError, ConnectionClosedError)
+
+# Throttling and transient errors are retried by the shared scheduler (see
+# ``AWSIntegration._call_aws``), so botocore must not retry on top of it.
+CLIENT_CONFIG = Config(retries={"total_max_attempts": 1})
 
 
 class _AWSPaginator:
-    def __init__(self, client, method, key) -> None:
+    def __init__(self, client, method, key, call: Optional[Callable] = None) -> None:
         self.fn = getattr(client, method)
         self.key = key
+        self.call = call or (lambda fn, **kwargs: fn(**kwargs))
         self.next_token = None
 
     def paginate(self, **kwargs) -> Generator[Dict, None, None]:
         while True:
             if self.next_token:
                 kwargs["NextToken"] = self.next_token
-            res = self.fn(**kwargs)
+            res = self.call(self.fn, **kwargs)
             for item in res.get(self.key, []):
                 yield item
             if not res.get("NextToken"):
@@ -31,14 +64,35 @@ class AWSIntegration:
     def supports_importing_new(cls) -> bool:
         return False
 
+    def _call_aws(self, fn, **kwargs):
+        """
+        Call a boto3 client method within this integration's rate limit budget. Throttling,
+        5xx responses and dropped connections are all retried with backoff by the scheduler,
+        standing in for botocore's own retries.
+        """
+
+        def send():
+            try:
+                return fn(**kwargs)
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+                if code in THROTTLING_ERROR_CODES or status in TRANSIENT_STATUS_CODES:
+                    raise Throttled()
+                raise
+            except TRANSIENT_EXCEPTIONS:
+                raise Throttled()
+
+        return self._schedule(send)
+
 
 class IAM(Integration, AWSIntegration, slug="iam"):
     @cached_property
     def _iam(self):
-        return boto3.client("iam")
+        return boto3.client("iam", config=CLIENT_CONFIG)
 
     def prompt_for_creds(self) -> None:
-        self._iam.get_user()
+        self._call_aws(self._iam.get_user)
 
     def prompt_for_external_id(self) -> str:
         try:
@@ -50,7 +104,7 @@ class IAM(Integration, AWSIntegration, slug="iam"):
 
     def _get_current_iam_user(self) -> dict:
         try:
-            return self._iam.get_user()
+            return self._call_aws(self._iam.get_user)
         except (ClientError, BotoCoreError) as e:
             # Some error codes are embedded in the basic ClientError and must be parsed from the message itself.
             error_message = str(e)
@@ -68,7 +122,7 @@ class IAM(Integration, AWSIntegration, slug="iam"):
 
     def _fetch_user(self, email: str):
         try:
-            user = self._iam.get_user(UserName=email)
+            user = self._call_aws(self._iam.get_user, UserName=email)
         except self._iam.exceptions.NoSuchEntityException:
             return None
         return user["User"]["Arn"]
@@ -82,13 +136,19 @@ class IAM(Integration, AWSIntegration, slug="iam"):
 
 
 class SSO(Integration, AWSIntegration, slug="aws_sso"):
+    MAX_WORKERS = 8
+
     def __init__(self) -> None:
         self.instances = []
 
+    @cached_property
+    def _identitystore(self):
+        return boto3.client("identitystore", config=CLIENT_CONFIG)
+
     def _get_sso_instances(self) -> Dict[str, str]:
-        sso_admin = boto3.client("sso-admin")
+        sso_admin = boto3.client("sso-admin", config=CLIENT_CONFIG)
         try:
-            instances = sso_admin.list_instances()
+            instances = self._call_aws(sso_admin.list_instances)
         except sso_admin.exceptions.AccessDeniedException:
             raise IntegrationException(
                 "Access Denied: Please ensure you can ListInstances for AWS SSO Admin."
@@ -121,18 +181,34 @@ class SSO(Integration, AWSIntegration, slug="aws_sso"):
         return inquirer.prompt([question])["instance_arn"]
 
     def _fetch_identitystore_user(self, instance, email) -> Optional[str]:
-        identitystore = boto3.client("identitystore")
-        paginator = _AWSPaginator(identitystore, "list_users", "Users")
+        paginator = _AWSPaginator(self._identitystore, "list_users", "Users", self._call_aws)
         for user in paginator.paginate(
             IdentityStoreId=instance,
             Filters=[{"AttributePath": "UserName", "AttributeValue": email}],
         ):
             return user["UserId"]
 
+    def _resolve_email(self, email: str) -> Optional[str]:
+        """
+        Look up ``email`` in each selected identity store, in the order the
+        instances were selected, stopping at the first store that has it.
+        """
+        for instance in self.instances:
+            if id := self._fetch_identitystore_user(instance, email):
+                return id
+        return None
+
     def fetch(self, emails: Set[str]) -> Dict[str, str]:
+        if not emails or not self.instances:
+            return {}
+
+        # Force client creation on this thread; boto3 clients are thread-safe once built.
+        self._identitystore
+
+        pending = list(emails)
         results = {}
-        for instance in self.instances:
-            for email in emails:
-                if id := self._fetch_identitystore_user(instance, email):
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(pending))) as executor:
+            for email, id in zip(pending, executor.map(self._resolve_email, pending)):
+                if id:
                     results[email] = id
         return results
@@ -1,10 +1,12 @@
 import os
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Set, Type
+from typing import Callable, Dict, Optional, Set, Type
 
 import click
 from click import ClickException
 
+from .rate_limit import RateLimiter, T, Throttled
+
 
 class IntegrationException(ClickException):
     pass
@@ -12,9 +14,12 @@ class IntegrationException(ClickException):
 
 class Integration(ABC):
     _registry: Dict[str, Type["Integration"]] = {}
+    scheduler = RateLimiter()
+    slug: str
 
     def __init_subclass__(cls: Type["Integration"], /, slug, **kwargs):
         super().__init_subclass__(**kwargs)
+        cls.slug = slug
         cls._registry[slug] = cls
 
     @abstractmethod
@@ -45,3 +50,13 @@ class Integration(ABC):
         if env_value := os.environ.get(env_var):
             return env_value
         return click.prompt(f"Enter {label}")
+
+    def _schedule(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Call ``fn`` within this provider's rate limit budget. ``fn`` should raise
+        ``Throttled`` when the provider rate limits the request.
+        """
+        try:
+            return self.scheduler.call(self.slug, fn, *args, **kwargs)
+        except Throttled:
+            raise IntegrationException(f"Rate limited by {self.slug}! Please try again later.")
@@ -1,9 +1,32 @@
-from typing import Dict, Generator, Optional, Set, Tuple
+from typing import Callable, Dict, Generator, Optional, Set, Tuple
 
 import inquirer
 import pdpyras
 
 from .integration import Integration, IntegrationException
+from .rate_limit import Throttled, parse_retry_after
+
+
+class _ScheduledAPISession(pdpyras.APISession):
+    """
+    An APISession which sends every request through ``schedule``, so it waits for a
+    token first and is retried after ``Retry-After`` when PagerDuty responds with a 429.
+    """
+
+    def __init__(self, api_key: str, schedule: Callable) -> None:
+        super().__init__(api_key)
+        self.schedule = schedule
+        self.hooks["response"].append(self._raise_on_throttle)
+
+    def _raise_on_throttle(self, response, *args, **kwargs):
+        # Raising from the response hook stops pdpyras from retrying the 429 itself with
+        # its own sleep timer, and hands the retry to the scheduler instead.
+        if response.status_code == 429:
+            raise Throttled(parse_retry_after(response.headers.get("Retry-After")))
+        return response
+
+    def request(self, method, url, **kwargs):
+        return self.schedule(super().request, method, url, **kwargs)
 
 
 class PagerDuty(Integration, slug="pagerduty"):
@@ -12,7 +35,7 @@ class PagerDuty(Integration, slug="pagerduty"):
 
     def prompt_for_creds(self) -> None:
         api_key = self.env_or_prompt("PAGERDUTY_API_KEY", "PagerDuty API Key")
-        self.session = pdpyras.APISession(api_key)
+        self.session = _ScheduledAPISession(api_key, self._schedule)
         try:
             self.session.get("users")
         except pdpyras.PDClientError:
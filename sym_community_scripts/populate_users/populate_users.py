@@ -6,6 +6,7 @@
 # License: BSD-3-Clause
 
 import csv
+from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Set
 
@@ -14,6 +15,7 @@ import inquirer
 
 from ..script import Script
 from .integration import Integration, IntegrationException
+from .rate_limit import Budget
 
 
 class PopulateUsers(Script):
@@ -29,11 +31,14 @@ class PopulateUsers(Script):
         integrations: List[str],
         *,
         import_new: bool,
+        delta: bool = False,
     ) -> None:
         self.csv_path = csv_path
         self.db = self._parse_csv(csv_path)
         self.integrations = set(integrations) or self._default_integrations()
         self.import_new = import_new
+        self.delta = delta
+        self.changes: Dict[str, Set[str]] = defaultdict(set)
 
     @classmethod
     def _parse_csv(cls, csv_path: Path) -> Dict[str, Dict[str, str]]:
@@ -83,6 +88,56 @@ class PopulateUsers(Script):
         except IndexError:
             return key
 
+    def _set_cell(self, email: str, column: str, value: str):
+        """Set a cell in the db, recording it as changed if the value differs."""
+        if self.db[email].get(column) != value:
+            self.db[email][column] = value
+            self.changes[email].add(column)
+
+    def _delta_path(self) -> Path:
+        return self.csv_path.with_suffix(".delta.csv")
+
+    def _delta_summary_path(self) -> Path:
+        return self.csv_path.with_suffix(".delta.summary.csv")
+
+    def _delta_fieldnames(self) -> List[str]:
+        changed = set().union(*self.changes.values())
+        return [
+            f
+            for f in self._integrations()
+            if f in changed or f in (self.EMAIL_KEY, self.SYM_CLOUD_KEY, self.USER_ID_KEY)
+        ]
+
+    def _change_summary(self) -> Dict[str, int]:
+        """Count the changed cells per column, in the db's column order."""
+        per_column = defaultdict(int)
+        for columns in self.changes.values():
+            for column in columns:
+                per_column[column] += 1
+        return {c: per_column[c] for c in self._integrations() if per_column.get(c)}
+
+    def write_delta(self):
+        """
+        Write only the changed rows and columns of the db next to the full CSV,
+        along with a summary of the changed cells per column.
+        """
+        fieldnames = self._delta_fieldnames()
+        with self._delta_path().open("w") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            for email in self.changes:
+                writer.writerow(self.db[email])
+
+        with self._delta_summary_path().open("w") as f:
+            writer = csv.writer(f)
+            writer.writerow(["column", "changed_cells"])
+            writer.writerows(self._change_summary().items())
+
+    def _report_changes(self):
+        click.secho(f"\nChanged {len(self.changes)} rows", bold=True)
+        for column, count in self._change_summary().items():
+            click.secho(f"{column}: {count} cells")
+
     def write_db(self):
         with self.csv_path.open("w") as f:
             writer = csv.DictWriter(f, fieldnames=self._integrations())
@@ -90,6 +145,14 @@ class PopulateUsers(Script):
             for row in self.db.values():
                 writer.writerow(row)
 
+    def _report_rate_limits(self):
+        for slug, metrics in Integration.scheduler.metrics().items():
+            click.secho(
+                f"{slug}: {metrics['requests']} requests, {metrics['throttled']} throttled, "
+                f"{metrics['queue_wait']:.1f}s queued (max {metrics['max_queue_wait']:.1f}s)",
+                dim=True,
+            )
+
     def run(self):
         for integration in self.integrations:
             click.secho(f"\nIntegration: {integration}", bold=True)
@@ -128,14 +191,10 @@ class PopulateUsers(Script):
                 emails = list(results.keys())
 
             for email, value in results.items():
-                if self.db.get(email):
-                    self.db[email][integration_header] = value
-                else:
-                    self.db[email] = {
-                        self.USER_ID_KEY: None,
-                        integration_header: value,
-                        self.SYM_CLOUD_KEY: email,
-                    }
+                if not self.db.get(email):
+                    self.db[email] = {self.USER_ID_KEY: None}
+                    self._set_cell(email, self.SYM_CLOUD_KEY, email)
+                self._set_cell(email, integration_header, value)
 
             click.secho(f"Updated {len(results)} rows!", fg="green")
 
@@ -144,6 +203,32 @@ class PopulateUsers(Script):
                 click.secho(f"There are {remaining} blanks.", fg="yellow")
 
         self.write_db()
+        if self.delta:
+            self.write_delta()
+            self._report_changes()
+        self._report_rate_limits()
+
+
+def _parse_rate_limit(ctx, param, values: List[str]) -> Dict[str, Budget]:
+    budgets = {}
+    for value in values:
+        try:
+            slug, limit = value.split("=")
+            rate, _, burst = limit.partition(":")
+            budget = Budget(rate=float(rate), burst=int(burst or 1))
+        except ValueError:
+            raise click.BadParameter(f"Expected SLUG=RATE[:BURST], got '{value}'")
+
+        if slug not in Integration._registry:
+            services = ", ".join(sorted(Integration._registry))
+            raise click.BadParameter(f"Unknown service '{slug}', expected one of: {services}")
+        if budget.rate <= 0:
+            raise click.BadParameter(f"Rate for '{slug}' must be greater than 0")
+        if budget.burst < 1:
+            raise click.BadParameter(f"Burst for '{slug}' must be at least 1")
+
+        budgets[slug] = budget
+    return budgets
 
 
 @click.command()
@@ -160,6 +245,28 @@ class PopulateUsers(Script):
 )
 @click.option("--import-new/--no-import-new", default=False)
 @click.option("-i", "--integration", multiple=True, type=str)
-def populate_users(csv_path: str, import_new: bool, integration: List[str]):
-    s = PopulateUsers(Path(csv_path), integration, import_new=import_new)
+@click.option(
+    "--delta/--no-delta",
+    default=False,
+    help="Also write the changed rows and a change summary to .delta.csv files.",
+)
+@click.option(
+    "-r",
+    "--rate-limit",
+    multiple=True,
+    type=str,
+    callback=_parse_rate_limit,
+    help="Requests per second for a service, as SLUG=RATE[:BURST].",
+)
+def populate_users(
+    csv_path: str,
+    import_new: bool,
+    integration: List[str],
+    delta: bool,
+    rate_limit: Dict[str, Budget],
+):
+    for slug, budget in rate_limit.items():
+        Integration.scheduler.configure(slug, budget)
+
+    s = PopulateUsers(Path(csv_path), integration, import_new=import_new, delta=delta)
     s.run()
@@ -0,0 +1,176 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Mapping, NamedTuple, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Budget(NamedTuple):
+    """A sustained request ``rate`` (per second) plus the ``burst`` allowed above it."""
+
+    rate: float
+    burst: int = 1
+
+
+class Throttled(Exception):
+    """Raised by a scheduled call when the provider reports it is being rate limited."""
+
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"Throttled (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header, which is either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitMetrics:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.throttled = 0
+        self.queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "queue_wait": self.queue_wait,
+            "max_queue_wait": self.max_queue_wait,
+        }
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        budget: Budget,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.budget = budget
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(budget.burst)
+        # Tokens refill from this point on. It is in the future while the bucket is paused.
+        self.updated = clock()
+        self.metrics = RateLimitMetrics()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before spending it."""
+        with self._lock:
+            now = self.clock()
+            if now > self.updated:
+                elapsed = now - self.updated
+                self.tokens = min(self.budget.burst, self.tokens + elapsed * self.budget.rate)
+                self.updated = now
+            self.tokens -= 1
+
+            wait = max(0.0, self.updated - now) + max(0.0, -self.tokens) / self.budget.rate
+            self.metrics.requests += 1
+            self.metrics.queue_wait += wait
+            self.metrics.max_queue_wait = max(self.metrics.max_queue_wait, wait)
+            return wait
+
+    def acquire(self) -> float:
+        if wait := self._reserve():
+            self.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every caller of this bucket for ``seconds``, e.g. after a 429. Only one
+        token is available when the pause ends, so queued callers resume at the budgeted
+        rate instead of all at once.
+        """
+        with self._lock:
+            self.metrics.throttled += 1
+            resume = self.clock() + seconds
+            if resume > self.updated:
+                self.updated = resume
+                self.tokens = min(self.tokens, 1.0)
+
+
+class RateLimiter:
+    """
+    Token-bucket scheduler shared by every Integration, with one bucket per provider slug.
+    """
+
+    DEFAULT_BUDGET = Budget(rate=10, burst=5)
+    DEFAULT_BUDGETS = {
+        # PagerDuty allows 960 requests per minute per API key.
+        "pagerduty": Budget(rate=15, burst=10),
+        "aptible": Budget(rate=5, burst=5),
+        "iam": Budget(rate=10, burst=5),
+        "aws_sso": Budget(rate=10, burst=5),
+    }
+
+    def __init__(
+        self,
+        budgets: Optional[Mapping[str, Budget]] = None,
+        *,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.budgets = {**self.DEFAULT_BUDGETS, **(budgets or {})}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, slug: str, budget: Budget) -> None:
+        with self._lock:
+            self.budgets[slug] = budget
+            if bucket := self.buckets.get(slug):
+                bucket.budget = budget
+
+    def bucket(self, slug: str) -> TokenBucket:
+        with self._lock:
+            if slug not in self.buckets:
+                budget = self.budgets.get(slug, self.DEFAULT_BUDGET)
+                self.buckets[slug] = TokenBucket(budget, clock=self.clock, sleep=self.sleep)
+            return self.buckets[slug]
+
+    def acquire(self, slug: str) -> float:
+        return self.bucket(slug).acquire()
+
+    def throttled(self, slug: str, retry_after: Optional[float] = None, attempt: int = 0) -> None:
+        if retry_after is None:
+            retry_after = self.backoff * 2 ** attempt
+        self.bucket(slug).pause(retry_after)
+
+    def call(self, slug: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run ``fn`` once a token for ``slug`` is available, retrying whenever it raises
+        ``Throttled``. The final ``Throttled`` is re-raised once retries are exhausted.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(slug)
+            try:
+                return fn(*args, **kwargs)
+            except Throttled as e:
+                if attempt == self.max_retries:
+                    raise
+                self.throttled(slug, e.retry_after, attempt)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {slug: bucket.metrics.as_dict() for slug, bucket in self.buckets.items()}
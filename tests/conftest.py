@@ -3,6 +3,7 @@ from typing import Dict, Set
 import pytest
 
 from sym_community_scripts.populate_users.integration import Integration
+from sym_community_scripts.populate_users.rate_limit import RateLimiter
 
 
 class IntegrationStub(Integration, slug="test"):
@@ -19,3 +20,26 @@ class IntegrationStub(Integration, slug="test"):
 @pytest.fixture
 def integration_stub():
     return IntegrationStub()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock, monkeypatch):
+    scheduler = RateLimiter(clock=clock, sleep=clock.sleep)
+    monkeypatch.setattr(Integration, "scheduler", scheduler)
+    return scheduler
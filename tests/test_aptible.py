@@ -0,0 +1,13 @@
+from sym_community_scripts.populate_users.aptible import Aptible
+
+
+def test_fetch_resource_retries_after_retry_after(mocker, scheduler, clock):
+    throttled = mocker.Mock(status_code=429, headers={"Retry-After": "2"})
+    ok = mocker.Mock(status_code=200, headers={})
+    ok.json.return_value = {"id": "org"}
+    request = mocker.patch("requests.request", side_effect=[throttled, ok])
+
+    assert Aptible()._fetch_aptible_resource("organizations") == {"id": "org"}
+    assert request.call_count == 2
+    assert clock.now == 2
+    assert scheduler.metrics()["aptible"]["throttled"] == 1
@@ -0,0 +1,76 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from sym_community_scripts.populate_users.aws import IAM, SSO
+from sym_community_scripts.populate_users.integration import IntegrationException
+
+
+class TestSSOFetch:
+    @pytest.fixture
+    def sso(self, mocker):
+        directory = {
+            "first": {"a@symops.io": "first-a"},
+            "second": {"a@symops.io": "second-a", "b@symops.io": "second-b"},
+        }
+
+        sso = SSO()
+        sso.instances = ["first", "second"]
+        mocker.patch.object(SSO, "_identitystore")
+        mocker.patch.object(
+            sso,
+            "_fetch_identitystore_user",
+            side_effect=lambda instance, email: directory[instance].get(email),
+        )
+        return sso
+
+    def test_fetch_prefers_earlier_instances(self, sso):
+        results = sso.fetch({"a@symops.io", "b@symops.io", "c@symops.io"})
+        assert results == {"a@symops.io": "first-a", "b@symops.io": "second-b"}
+
+    def test_fetch_skips_resolved_emails(self, sso):
+        sso.fetch({"a@symops.io"})
+        sso._fetch_identitystore_user.assert_called_once_with("first", "a@symops.io")
+
+
+class TestCallAWS:
+    def test_retries_throttling(self, mocker, scheduler, clock):
+        throttled = ClientError({"Error": {"Code": "Throttling"}}, "GetUser")
+        get_user = mocker.Mock(side_effect=[throttled, {"User": {}}])
+
+        assert IAM()._call_aws(get_user, UserName="a@symops.io") == {"User": {}}
+        assert get_user.call_count == 2
+        assert clock.now == scheduler.backoff
+        assert scheduler.metrics()["iam"]["throttled"] == 1
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            ClientError(
+                {
+                    "Error": {"Code": "ServiceUnavailable"},
+                    "ResponseMetadata": {"HTTPStatusCode": 503},
+                },
+                "ListUsers",
+            ),
+            ClientError({"Error": {"Code": "SlowDown"}}, "ListUsers"),
+            EndpointConnectionError(endpoint_url="https://identitystore.amazonaws.com"),
+        ],
+    )
+    def test_retries_transient_errors(self, mocker, scheduler, error):
+        list_users = mocker.Mock(side_effect=[error, {"Users": []}])
+
+        assert SSO()._call_aws(list_users) == {"Users": []}
+        assert list_users.call_count == 2
+
+    def test_gives_up_after_max_retries(self, mocker, scheduler):
+        scheduler.max_retries = 1
+        throttled = ClientError({"Error": {"Code": "ThrottlingException"}}, "ListUsers")
+
+        with pytest.raises(IntegrationException):
+            SSO()._call_aws(mocker.Mock(side_effect=throttled))
+
+    def test_other_errors_are_raised(self, mocker, scheduler):
+        denied = ClientError({"Error": {"Code": "AccessDenied"}}, "GetUser")
+
+        with pytest.raises(ClientError):
+            IAM()._call_aws(mocker.Mock(side_effect=denied))
@@ -0,0 +1,106 @@
+import pytest
+
+from sym_community_scripts.instances_without_ssm import REQUIRED_PERMISSIONS, InstancesWithoutSSM
+
+SSM_ARN = "arn:aws:iam::aws:policy/AmazonSSMManagedInstanceCore"
+OTHER_ARN = "arn:aws:iam::123456789012:policy/Other"
+
+
+def _document(actions):
+    return {
+        "Version": "2012-10-17",
+        "Statement": [{"Effect": "Allow", "Action": actions, "Resource": "*"}],
+    }
+
+
+@pytest.fixture
+def script(mocker):
+    mocker.patch.object(InstancesWithoutSSM, "init_clients")
+    return InstancesWithoutSSM()
+
+
+class TestBuildMatrix:
+    @pytest.fixture
+    def script(self, script, mocker):
+        script.instances = {
+            i: mocker.Mock(id=i, tags=[{"Key": "Name", "Value": i}])
+            for i in ("i-good", "i-unregistered", "i-norole")
+        }
+        script.instance_profiles["good"] = {"i-good", "i-unregistered"}
+        script.instance_profiles["norole"] = {"i-norole"}
+        script.profile_roles["good"] = {"ssm-role"}
+        script.roles["ssm-role"] = {SSM_ARN, OTHER_ARN}
+        script.ssm_policies = {SSM_ARN}
+        script.ssm_instance_ids = {"i-good"}
+
+        script.build_matrix()
+        return script
+
+    def test_instance_status(self, script):
+        good = script.instance_matrix["i-good"]
+        assert good.has_ssm_policy
+        assert good.registered
+        assert good.healthy
+
+        unregistered = script.instance_matrix["i-unregistered"]
+        assert unregistered.has_ssm_policy
+        assert not unregistered.registered
+        assert not unregistered.healthy
+
+    def test_profile_without_roles(self, script):
+        status = script.instance_matrix["i-norole"]
+        assert status.roles == frozenset()
+        assert not status.has_ssm_policy
+        assert not status.registered
+        assert not status.healthy
+
+    def test_policy_instances(self, script):
+        assert dict(script.policy_instances) == {
+            SSM_ARN: {"i-good", "i-unregistered"},
+            OTHER_ARN: {"i-good", "i-unregistered"},
+        }
+        assert script.instances_affected_by("Missing") == set()
+        assert script.instances_relying_on(SSM_ARN) == {"i-good", "i-unregistered"}
+
+    def test_instances_reported_once(self, script, capsys):
+        script.check_instances()
+        script.check_ssm_instances()
+
+        output = capsys.readouterr().out
+        assert output.count("Instance i-norole has the following tags") == 1
+        assert output.count("Instance i-unregistered has the following tags") == 1
+
+
+class TestInlinePolicies:
+    @pytest.fixture
+    def script(self, script, mocker):
+        documents = {
+            "ssm-role": _document(REQUIRED_PERMISSIONS),
+            "s3-role": _document(["s3:GetObject"]),
+        }
+        script.iam = mocker.Mock()
+        script.iam.list_role_policies.return_value = {"PolicyNames": ["inline"]}
+        script.iam.get_role_policy.side_effect = lambda RoleName, PolicyName: {
+            "PolicyDocument": documents[RoleName]
+        }
+        script.iam.list_attached_role_policies.return_value = {"AttachedPolicies": []}
+
+        script.instance_profiles["ssm"] = {"i-ssm"}
+        script.instance_profiles["s3"] = {"i-s3"}
+        script.profile_roles["ssm"] = {"ssm-role"}
+        script.profile_roles["s3"] = {"s3-role"}
+        script.roles["ssm-role"] = set()
+        script.roles["s3-role"] = set()
+
+        script.populate_policies()
+        script.check_policies()
+        script.build_matrix()
+        return script
+
+    def test_same_name_inline_policies_are_separate(self, script):
+        assert script.ssm_policies == {("ssm-role", "inline")}
+        assert script.instance_matrix["i-ssm"].has_ssm_policy
+        assert not script.instance_matrix["i-s3"].has_ssm_policy
+        assert script.instances_affected_by(("ssm-role", "inline")) == {"i-ssm"}
+        assert script.instances_relying_on(("ssm-role", "inline")) == {"i-ssm"}
+        assert script.instances_affected_by(("s3-role", "inline")) == {"i-s3"}
@@ -0,0 +1,30 @@
+import requests
+
+from sym_community_scripts.populate_users.pagerduty import PagerDuty
+
+
+def _response(status_code, headers=None, body=b"{}"):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+
+def test_session_retries_after_retry_after(mocker, scheduler, clock):
+    responses = [_response(429, {"Retry-After": "2"}), _response(200)]
+
+    def adapter_send(request, **kwargs):
+        response = responses.pop(0)
+        response.request = request
+        response.url = request.url
+        return response
+
+    send = mocker.patch("requests.adapters.HTTPAdapter.send", side_effect=adapter_send)
+    mocker.patch.dict("os.environ", {"PAGERDUTY_API_KEY": "key"})
+
+    PagerDuty().prompt_for_creds()
+
+    assert send.call_count == 2
+    assert clock.now == 2
+    assert scheduler.metrics()["pagerduty"]["throttled"] == 1
@@ -0,0 +1,48 @@
+import csv
+
+import pytest
+
+from sym_community_scripts.populate_users.populate_users import PopulateUsers
+
+from .conftest import IntegrationStub
+
+
+def _read_csv(path):
+    with path.open() as f:
+        return list(csv.DictReader(f))
+
+
+class TestDelta:
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        csv_path = tmp_path / "users.csv"
+        csv_path.write_text("User ID,sym:cloud,test:ext\n1,a@symops.io,A\n2,b@symops.io,\n")
+        return csv_path
+
+    @pytest.fixture(autouse=True)
+    def fetch(self, mocker, scheduler):
+        return mocker.patch.object(
+            IntegrationStub,
+            "fetch",
+            return_value={"a@symops.io": "A", "b@symops.io": "B", "c@symops.io": "C"},
+        )
+
+    def test_run_writes_only_changes(self, csv_path):
+        PopulateUsers(csv_path, ["test:ext"], import_new=True, delta=True).run()
+
+        assert _read_csv(csv_path.with_suffix(".delta.csv")) == [
+            {"User ID": "2", "sym:cloud": "b@symops.io", "test:ext": "B"},
+            {"User ID": "", "sym:cloud": "c@symops.io", "test:ext": "C"},
+        ]
+        assert _read_csv(csv_path.with_suffix(".delta.summary.csv")) == [
+            {"column": "sym:cloud", "changed_cells": "1"},
+            {"column": "test:ext", "changed_cells": "2"},
+        ]
+        assert len(_read_csv(csv_path)) == 3
+
+    def test_run_without_delta(self, csv_path):
+        PopulateUsers(csv_path, ["test:ext"], import_new=True, delta=False).run()
+
+        assert not csv_path.with_suffix(".delta.csv").exists()
+        assert not csv_path.with_suffix(".delta.summary.csv").exists()
+        assert len(_read_csv(csv_path)) == 3
@@ -0,0 +1,58 @@
+import pytest
+
+from sym_community_scripts.populate_users.rate_limit import (
+    Budget,
+    RateLimiter,
+    Throttled,
+    TokenBucket,
+    parse_retry_after,
+)
+
+
+class TestTokenBucket:
+    def test_pause_releases_queued_callers_at_rate(self, clock):
+        bucket = TokenBucket(Budget(rate=2, burst=2), clock=clock, sleep=clock.sleep)
+        bucket.pause(3)
+
+        waits = [bucket._reserve() for _ in range(8)]
+
+        assert waits == [3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5]
+        assert bucket.metrics.throttled == 1
+
+
+class TestRateLimiter:
+    @pytest.fixture
+    def limiter(self, clock):
+        return RateLimiter({"test": Budget(rate=2, burst=2)}, clock=clock, sleep=clock.sleep)
+
+    def test_acquire_allows_burst_then_waits(self, limiter, clock):
+        assert [limiter.acquire("test") for _ in range(4)] == [0, 0, 0.5, 0.5]
+        assert limiter.metrics()["test"]["queue_wait"] == 1.0
+
+    def test_call_honors_retry_after(self, limiter, clock):
+        responses = [Throttled(retry_after=3), "ok"]
+
+        def fn():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        assert limiter.call("test", fn) == "ok"
+        assert clock.now == 3
+        assert limiter.metrics()["test"]["throttled"] == 1
+
+    def test_call_gives_up_after_max_retries(self, limiter):
+        limiter.max_retries = 1
+
+        def fn():
+            raise Throttled()
+
+        with pytest.raises(Throttled):
+            limiter.call("test", fn)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None